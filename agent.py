@@ -3,28 +3,37 @@
 Startup Job Search Agent
 Main application that orchestrates all modules to help users find startup jobs
 """
+import logging
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from resume_parser import ResumeParser
 from linkedin_finder import LinkedInFinder
 from job_searcher import JobSearcher
 from email_drafter import EmailDrafter
-from gmail_integration import GmailIntegration
 from typing import Dict, List
 
 
+logger = logging.getLogger('jobagent')
+
+
 class StartupJobSearchAgent:
     """Main agent that coordinates the job search process"""
     
     def __init__(self):
         load_dotenv()
+        self._configure_logging()
         self.resume_parser = ResumeParser()
         self.linkedin_finder = LinkedInFinder()
         self.job_searcher = JobSearcher()
         self.email_drafter = EmailDrafter()
         self.gmail_integration = None
     
+    def close(self):
+        """Release the HTTP connections and caches held by the LinkedIn finder"""
+        self.linkedin_finder.close()
+    
     def run(self, resume_path: str, location: str = None):
         """
         Run the complete job search agent workflow
@@ -33,66 +42,84 @@ class StartupJobSearchAgent:
             resume_path: Path to the resume PDF file
             location: Job search location (optional, uses default from .env)
         """
-        print("=" * 80)
-        print("🚀 Startup Job Search Agent")
-        print("=" * 80)
-        print()
+        # Each step's output is collected and emitted with one logging call;
+        # step headers are logged up front so progress stays visible
+        self._log_lines([
+            "=" * 80,
+            "🚀 Startup Job Search Agent",
+            "=" * 80,
+            ""
+        ])
         
         # Step 1: Parse resume
-        print("📄 Step 1: Parsing your resume...")
+        logger.info("📄 Step 1: Parsing your resume...")
         user_profile = self.resume_parser.parse_resume(resume_path)
         
         if not user_profile.get('name'):
-            print("Error: Could not extract information from resume. Please check the file.")
+            logger.error("Error: Could not extract information from resume. Please check the file.")
             return
         
-        print(f"✓ Extracted profile for: {user_profile['name']}")
-        print(f"  Email: {user_profile.get('email', 'Not found')}")
-        print(f"  LinkedIn: {user_profile.get('linkedin_url', 'Not found')}")
-        print(f"  Skills: {', '.join(user_profile.get('skills', [])[:5])}")
-        print()
+        self._log_lines([
+            f"✓ Extracted profile for: {user_profile['name']}",
+            f"  Email: {user_profile.get('email', 'Not found')}",
+            f"  LinkedIn: {user_profile.get('linkedin_url', 'Not found')}",
+            f"  Skills: {', '.join(user_profile.get('skills', [])[:5])}",
+            ""
+        ])
         
-        # Step 2: Find LinkedIn and online presence
-        print("🔍 Step 2: Finding your online presence...")
+        search_location = location or os.getenv('DEFAULT_LOCATION', 'San Francisco, CA')
         
-        if not user_profile.get('linkedin_url') and user_profile.get('name'):
-            linkedin_url = self.linkedin_finder.search_profile(
-                user_profile['name'],
-                user_profile.get('email', '')
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # The job search only needs the parsed skills, so start it now and
+            # let it run while the online presence lookups are in flight
+            jobs_future = executor.submit(
+                self.job_searcher.find_matching_jobs,
+                dict(user_profile),
+                search_location,
+                max_jobs=10
             )
-            if linkedin_url:
+            
+            # Step 2: Find LinkedIn and online presence
+            logger.info("🔍 Step 2: Finding your online presence...")
+            lines = []
+            
+            # The LinkedIn search and the profile probes run together on one
+            # event loop while the job search continues in its own thread
+            enriched = self.linkedin_finder.enrich_profiles([user_profile])[0]
+            
+            if enriched['linkedin_url']:
+                linkedin_url = enriched['linkedin_url']
                 user_profile['linkedin_url'] = linkedin_url
-                print(f"✓ Found LinkedIn profile: {linkedin_url}")
-        
-        if user_profile.get('email'):
-            online_presence = self.linkedin_finder.find_additional_online_presence(
-                user_profile['name'],
-                user_profile['email']
-            )
-            user_profile['online_presence'] = online_presence
+                lines.append(f"✓ Found LinkedIn profile: {linkedin_url}")
             
-            if online_presence.get('github'):
-                print(f"✓ Found GitHub: {online_presence['github']}")
-            if online_presence.get('twitter'):
-                print(f"✓ Found Twitter: {online_presence['twitter']}")
-        print()
-        
-        # Step 3: Search for jobs
-        print("💼 Step 3: Searching for matching startup jobs...")
-        
-        search_location = location or os.getenv('DEFAULT_LOCATION', 'San Francisco, CA')
-        print(f"  Location: {search_location}")
-        
-        jobs = self.job_searcher.find_matching_jobs(user_profile, search_location, max_jobs=10)
+            if enriched['online_presence'] is not None:
+                online_presence = enriched['online_presence']
+                user_profile['online_presence'] = online_presence
+                
+                if online_presence.get('github'):
+                    lines.append(f"✓ Found GitHub: {online_presence['github']}")
+                if online_presence.get('twitter'):
+                    lines.append(f"✓ Found Twitter: {online_presence['twitter']}")
+            lines.append("")
+            self._log_lines(lines)
+            
+            # Step 3: Search for jobs
+            self._log_lines([
+                "💼 Step 3: Searching for matching startup jobs...",
+                f"  Location: {search_location}"
+            ])
+            
+            jobs = jobs_future.result()
         
-        print(f"✓ Found {len(jobs)} matching jobs:")
+        lines = [f"✓ Found {len(jobs)} matching jobs:"]
         for i, job in enumerate(jobs[:5], 1):
-            print(f"  {i}. {job['title']} at {job['company']}")
-            print(f"     Match score: {job.get('match_score', 0)} | Source: {job.get('source', 'N/A')}")
-        print()
+            lines.append(f"  {i}. {job['title']} at {job['company']}")
+            lines.append(f"     Match score: {job.get('match_score', 0)} | Source: {job.get('source', 'N/A')}")
+        lines.append("")
+        self._log_lines(lines)
         
         # Step 4: Draft cold emails
-        print("✉️  Step 4: Drafting personalized cold emails...")
+        logger.info("✉️  Step 4: Drafting personalized cold emails...")
         
         drafted_emails = self.email_drafter.draft_multiple_emails(
             user_profile, 
@@ -100,72 +127,125 @@ class StartupJobSearchAgent:
             limit=5
         )
         
-        print(f"✓ Drafted {len(drafted_emails)} personalized emails")
-        print()
+        self._log_lines([
+            f"✓ Drafted {len(drafted_emails)} personalized emails",
+            ""
+        ])
         
         # Step 5: Create Gmail drafts
-        print("📧 Step 5: Creating Gmail drafts...")
+        logger.info("📧 Step 5: Creating Gmail drafts...")
         
         # Always save drafts locally first
         self._save_drafts_locally(drafted_emails)
         
-        try:
-            self.gmail_integration = GmailIntegration()
-            
-            if self.gmail_integration.service:
-                print("  Note: Gmail API requires actual recipient email addresses.")
-                print("  You can manually create Gmail drafts or update recipient emails and run again.")
+        # Connecting to Gmail can open a browser for OAuth consent, so only
+        # do it when the user asks for it
+        if self._confirm("  Connect to Gmail to create drafts? (y/N): "):
+            try:
+                # The Google API client libraries are slow to import, so only load
+                # them once the Gmail step is actually reached
+                from gmail_integration import GmailIntegration
                 
-                # Uncomment the following lines when you have actual recipient emails
-                # draft_results = self.gmail_integration.create_multiple_drafts(drafted_emails)
-                # print(f"✓ Created {len(draft_results)} drafts in Gmail")
+                self.gmail_integration = GmailIntegration()
                 
-        except Exception as e:
-            print(f"  Could not connect to Gmail: {e}")
-        
-        print()
-        print("=" * 80)
-        print("✅ Job search complete!")
-        print("=" * 80)
-        print()
-        print("Summary:")
-        print(f"  • Profile parsed: {user_profile['name']}")
-        print(f"  • Jobs found: {len(jobs)}")
-        print(f"  • Emails drafted: {len(drafted_emails)}")
-        print(f"  • Drafts saved to: email_drafts.txt")
-        print()
-        print("Next steps:")
-        print("  1. Review the drafted emails in 'email_drafts.txt'")
-        print("  2. Customize them as needed")
-        print("  3. Send them to the companies or create Gmail drafts manually")
-        print()
+                if self.gmail_integration.service:
+                    self._log_lines([
+                        "  Note: Gmail API requires actual recipient email addresses.",
+                        "  You can manually create Gmail drafts or update recipient emails and run again."
+                    ])
+                    
+                    # Uncomment the following lines when you have actual recipient emails
+                    # draft_results = self.gmail_integration.create_multiple_drafts(drafted_emails)
+                    # logger.info(f"✓ Created {len(draft_results)} drafts in Gmail")
+                    
+            except Exception as e:
+                logger.warning(f"  Could not connect to Gmail: {e}")
+        else:
+            logger.info("  Skipped Gmail; drafts are available in email_drafts.txt")
+        
+        self._log_lines([
+            "",
+            "=" * 80,
+            "✅ Job search complete!",
+            "=" * 80,
+            "",
+            "Summary:",
+            f"  • Profile parsed: {user_profile['name']}",
+            f"  • Jobs found: {len(jobs)}",
+            f"  • Emails drafted: {len(drafted_emails)}",
+            f"  • Drafts saved to: email_drafts.txt",
+            "",
+            "Next steps:",
+            "  1. Review the drafted emails in 'email_drafts.txt'",
+            "  2. Customize them as needed",
+            "  3. Send them to the companies or create Gmail drafts manually",
+            ""
+        ])
+    
+    def _configure_logging(self):
+        """Print agent output as plain lines on stdout; JOBAGENT_QUIET silences it"""
+        if not logger.handlers:
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+            logger.propagate = False
+        
+        quiet = os.getenv('JOBAGENT_QUIET', '').strip().lower() in ('1', 'true', 'yes')
+        logger.setLevel(logging.WARNING if quiet else logging.INFO)
+    
+    def _log_lines(self, lines: List[str]):
+        """Emit a block of output lines with a single logging call"""
+        logger.info("\n".join(lines))
+    
+    def _confirm(self, prompt: str) -> bool:
+        """Ask a yes/no question, treating no answer (e.g. piped stdin) as no"""
+        try:
+            return input(prompt).strip().lower() in ('y', 'yes')
+        except EOFError:
+            # input() leaves the prompt without a line ending when stdin closes
+            print()
+            return False
     
     def _save_drafts_locally(self, drafted_emails: List[Dict]):
         """Save drafted emails to a local file"""
-        with open('email_drafts.txt', 'w', encoding='utf-8') as f:
-            f.write("=" * 80 + "\n")
-            f.write("DRAFTED JOB APPLICATION EMAILS\n")
-            f.write("=" * 80 + "\n\n")
-            
-            for i, email_data in enumerate(drafted_emails, 1):
-                job = email_data['job']
-                f.write(f"\n{'=' * 80}\n")
-                f.write(f"EMAIL #{i}\n")
-                f.write(f"{'=' * 80}\n\n")
-                f.write(f"To: [Find hiring manager email for {job['company']}]\n")
-                f.write(f"Subject: {email_data['subject']}\n\n")
-                f.write(f"Job Details:\n")
-                f.write(f"  Title: {job['title']}\n")
-                f.write(f"  Company: {job['company']}\n")
-                f.write(f"  Location: {job['location']}\n")
-                f.write(f"  URL: {job.get('url', 'N/A')}\n")
-                f.write(f"  Match Score: {job.get('match_score', 0)}\n\n")
-                f.write(f"Email Body:\n")
-                f.write(f"{'-' * 80}\n")
-                f.write(f"{email_data['email']}\n")
-                f.write(f"{'-' * 80}\n\n")
-        
-        print(f"✓ Drafts saved to: email_drafts.txt")
+        # Build the whole document in memory and write it out in one call
+        parts = [
+            "=" * 80 + "\n",
+            "DRAFTED JOB APPLICATION EMAILS\n",
+            "=" * 80 + "\n\n"
+        ]
+        
+        for i, email_data in enumerate(drafted_emails, 1):
+            job = email_data['job']
+            parts.append(
+                f"\n{'=' * 80}\n"
+                f"EMAIL #{i}\n"
+                f"{'=' * 80}\n\n"
+                f"To: [Find hiring manager email for {job['company']}]\n"
+                f"Subject: {email_data['subject']}\n\n"
+                f"Job Details:\n"
+                f"  Title: {job['title']}\n"
+                f"  Company: {job['company']}\n"
+                f"  Location: {job['location']}\n"
+                f"  URL: {job.get('url', 'N/A')}\n"
+                f"  Match Score: {job.get('match_score', 0)}\n\n"
+                f"Email Body:\n"
+                f"{'-' * 80}\n"
+                f"{email_data['email']}\n"
+                f"{'-' * 80}\n\n"
+            )
+        
+        # Encode once and hand the bytes to the kernel directly, so the file is
+        # written with a single syscall rather than through Python's buffers
+        blob = memoryview("".join(parts).encode('utf-8'))
+        fd = os.open('email_drafts.txt', os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            while blob:
+                blob = blob[os.write(fd, blob):]
+        finally:
+            os.close(fd)
+        
+        logger.info("✓ Drafts saved to: email_drafts.txt")
 
 
 def main():
@@ -194,7 +274,10 @@ def main():
     
     # Run the agent
     agent = StartupJobSearchAgent()
-    agent.run(resume_path, location)
+    try:
+        agent.run(resume_path, location)
+    finally:
+        agent.close()
 
 
 if __name__ == "__main__":
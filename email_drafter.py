@@ -2,14 +2,41 @@
 Email Drafter Module
 Creates personalized cold emails for job applications using AI
 """
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, List, Optional
+import asyncio
+import atexit
+import hashlib
+import json
 import os
-from openai import OpenAI
+import shelve
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
 
 
 class EmailDrafter:
     """Drafts personalized cold emails for job applications"""
     
+    # Upper bound on concurrent OpenAI requests when drafting in bulk
+    MAX_CONCURRENT_REQUESTS = 5
+    
+    # Static prompt text, shared by every drafting request so the start of each
+    # request is identical and eligible for OpenAI's automatic prompt caching
+    SYSTEM_PROMPT = "You are an expert career coach who writes compelling job application emails."
+    
+    EMAIL_REQUIREMENTS = """Requirements for the email:
+- Length: 150-200 words
+- Include: Brief introduction, why they're a good fit, and call to action
+- Make it personalized and authentic
+- Show enthusiasm for startups and the specific company
+- Highlight relevant skills that match the job
+- Format the email with proper structure (greeting, body, closing)
+
+"""
+    
+    # Local cache of AI drafts, reused across runs for identical profile/job pairs
+    CACHE_PATH = '.email_cache.db'
+    
     def __init__(self, api_key: str = None):
         """
         Initialize the email drafter
@@ -19,12 +46,47 @@ class EmailDrafter:
         """
         self.api_key = api_key or os.getenv('OPENAI_API_KEY')
         self.model = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')  # Configurable model
+        self._cache = None
         if self.api_key:
+            # Imported here so template-only runs don't pay the openai import cost
+            from openai import OpenAI
             self.client = OpenAI(api_key=self.api_key)
+            self._open_cache()
         else:
             self.client = None
             print("Warning: No OpenAI API key provided. Email drafting will use templates only.")
     
+    def _open_cache(self):
+        """Open the on-disk draft cache (only AI drafts are worth caching)"""
+        try:
+            self._cache = shelve.open(self.CACHE_PATH)
+            atexit.register(self._cache.close)
+        except Exception as e:
+            print(f"Warning: Could not open email draft cache: {e}")
+            self._cache = None
+    
+    def _cache_key(self, candidate_prefix: str, job: Dict, tone: str) -> str:
+        """
+        Hash the inputs that determine an AI draft
+        
+        The key is built from the rendered prompt, so any profile or job field
+        that reaches the model (including the experience summary) invalidates it.
+        """
+        messages = self._build_messages(candidate_prefix, job, tone)
+        payload = json.dumps([self.model, messages], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def _get_cached_draft(self, candidate_prefix: str, job: Dict, tone: str) -> Optional[Dict]:
+        """Return a previously cached {'subject', 'email'} draft, if any"""
+        if self._cache is None:
+            return None
+        return self._cache.get(self._cache_key(candidate_prefix, job, tone))
+    
+    def _store_cached_draft(self, candidate_prefix: str, job: Dict, tone: str, draft: Dict):
+        """Remember a successful AI draft for later runs"""
+        if self._cache is not None:
+            self._cache[self._cache_key(candidate_prefix, job, tone)] = draft
+    
     def draft_cold_email(self, user_profile: Dict, job: Dict, tone: str = "professional") -> str:
         """
         Draft a personalized cold email for a job application
@@ -38,52 +100,192 @@ class EmailDrafter:
             Drafted email text
         """
         if self.client and self.api_key:
-            return self._draft_with_ai(user_profile, job, tone)
+            candidate_prefix = self._candidate_prefix(user_profile)
+            cached = self._get_cached_draft(candidate_prefix, job, tone)
+            if cached:
+                return cached['email']
+            return self._draft_with_ai(user_profile, candidate_prefix, job, tone)
         else:
             return self._draft_with_template(user_profile, job)
     
-    def _draft_with_ai(self, user_profile: Dict, job: Dict, tone: str) -> str:
+    def _candidate_prefix(self, user_profile: Dict) -> str:
+        """
+        Build the candidate part of the prompt
+        
+        It only depends on the profile, so each drafting call builds it once,
+        passes it to the prompt and cache helpers, and places it before any
+        job-specific text to keep the shared prompt prefix stable.
+        """
+        return (
+            "Candidate Information:\n"
+            f"- Name: {user_profile.get('name', 'Candidate')}\n"
+            f"- Skills: {', '.join(user_profile.get('skills', [])[:5])}\n"
+            f"- Experience: {user_profile.get('experience', 'Relevant experience in the field')}\n\n"
+            + self.EMAIL_REQUIREMENTS
+        )
+    
+    def _build_messages(self, candidate_prefix: str, job: Dict, tone: str) -> List[Dict]:
+        """Build the chat messages used to draft a single email"""
+        prompt = (
+            candidate_prefix
+            + "Draft a compelling cold email for a job application with the following details:\n\n"
+            "Job Information:\n"
+            f"- Title: {job.get('title', 'Position')}\n"
+            f"- Company: {job.get('company', 'Startup')}\n"
+            f"- Description: {job.get('description', 'Exciting opportunity at a growing startup')}\n\n"
+            f"Tone: {tone}\n"
+        )
+        
+        return [
+            {"role": "system", "content": self.SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+    
+    def _draft_with_ai(self, user_profile: Dict, candidate_prefix: str, job: Dict, tone: str) -> str:
         """Draft email using OpenAI API"""
         try:
-            prompt = f"""
-            Draft a compelling cold email for a job application with the following details:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=self._build_messages(candidate_prefix, job, tone),
+                temperature=0.7,
+                max_tokens=500
+            )
             
-            Candidate Information:
-            - Name: {user_profile.get('name', 'Candidate')}
-            - Skills: {', '.join(user_profile.get('skills', [])[:5])}
-            - Experience: {user_profile.get('experience', 'Relevant experience in the field')}
+            email = response.choices[0].message.content.strip()
+            self._store_cached_draft(candidate_prefix, job, tone,
+                                     {'subject': self._default_subject(job), 'email': email})
+            return email
             
-            Job Information:
-            - Title: {job.get('title', 'Position')}
-            - Company: {job.get('company', 'Startup')}
-            - Description: {job.get('description', 'Exciting opportunity at a growing startup')}
+        except Exception as e:
+            print(f"Error drafting with AI: {e}")
+            return self._draft_with_template(user_profile, job)
+    
+    async def _draft_with_ai_async(self, aclient: 'AsyncOpenAI', semaphore: asyncio.Semaphore,
+                                   user_profile: Dict, candidate_prefix: str, job: Dict, tone: str) -> str:
+        """Draft email using the async OpenAI client, bounded by the shared semaphore"""
+        try:
+            async with semaphore:
+                response = await aclient.chat.completions.create(
+                    model=self.model,
+                    messages=self._build_messages(candidate_prefix, job, tone),
+                    temperature=0.7,
+                    max_tokens=500
+                )
             
-            Requirements:
-            - Tone: {tone}
-            - Length: 150-200 words
-            - Include: Brief introduction, why they're a good fit, and call to action
-            - Make it personalized and authentic
-            - Show enthusiasm for startups and the specific company
-            - Highlight relevant skills that match the job
+            email = response.choices[0].message.content.strip()
+            self._store_cached_draft(candidate_prefix, job, tone,
+                                     {'subject': self._default_subject(job), 'email': email})
+            return email
             
-            Format the email with proper structure (greeting, body, closing).
-            """
+        except Exception as e:
+            print(f"Error drafting with AI: {e}")
+            return self._draft_with_template(user_profile, job)
+    
+    async def _draft_multiple_emails_async(self, user_profile: Dict, candidate_prefix: str, jobs: List[Dict],
+                                           tone: str = "professional") -> List[str]:
+        """Draft emails for all jobs concurrently, preserving the order of jobs"""
+        from openai import AsyncOpenAI
+        
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_REQUESTS)
+        
+        # The async client is bound to the running event loop, so it is
+        # created per call rather than stored on the instance
+        async with AsyncOpenAI(api_key=self.api_key) as aclient:
+            tasks = [
+                self._draft_with_ai_async(aclient, semaphore, user_profile, candidate_prefix, job, tone)
+                for job in jobs
+            ]
+            return await asyncio.gather(*tasks)
+    
+    def _draft_batch_with_ai(self, candidate_prefix: str, jobs: List[Dict]) -> List[Optional[Dict]]:
+        """
+        Draft emails for several jobs with a single OpenAI request
+        
+        The candidate profile is sent once for all jobs and the model returns
+        every draft in one JSON object, instead of one request per job.
+        
+        Args:
+            candidate_prefix: Candidate part of the prompt from _candidate_prefix
+            jobs: List of job listings
             
+        Returns:
+            List aligned with jobs holding {'subject', 'email'} dictionaries,
+            with None for any job the model did not return a usable draft for
+        """
+        drafts = [None] * len(jobs)
+        if not jobs:
+            return drafts
+        
+        # Serialize compactly and keep non-ASCII text as-is; both whitespace and
+        # \uXXXX escapes would otherwise be billed as extra prompt tokens
+        job_list = json.dumps([
+            {
+                'idx': i,
+                'title': job.get('title', 'Position'),
+                'company': job.get('company', 'Startup'),
+                'description': job.get('description', 'Exciting opportunity at a growing startup')
+            }
+            for i, job in enumerate(jobs)
+        ], separators=(',', ':'), ensure_ascii=False)
+        
+        prompt = (
+            candidate_prefix
+            + "Draft one compelling cold email from the candidate for each job listed below.\n\n"
+            "Tone: professional\n\n"
+            "Respond with a JSON object of the form\n"
+            '{"emails": [{"idx": <job idx>, "subject": "<subject line>", "body": "<email text>"}]}\n\n'
+            f"Jobs:\n{job_list}\n"
+        )
+        
+        try:
             response = self.client.chat.completions.create(
                 model=self.model,
                 messages=[
-                    {"role": "system", "content": "You are an expert career coach who writes compelling job application emails."},
+                    {"role": "system", "content": self.SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
+                response_format={"type": "json_object"},
                 temperature=0.7,
-                max_tokens=500
+                max_tokens=500 * len(jobs)
             )
             
-            return response.choices[0].message.content.strip()
+            payload = json.loads(response.choices[0].message.content)
             
+        except json.JSONDecodeError as e:
+            print(f"Could not parse batched email drafts: {e}")
+            return drafts
         except Exception as e:
             print(f"Error drafting with AI: {e}")
-            return self._draft_with_template(user_profile, job)
+            return drafts
+        
+        # Valid JSON can still have the wrong shape; anything unusable is left
+        # as None so that job goes through the per-job fallback
+        emails = payload.get('emails') if isinstance(payload, dict) else None
+        if not isinstance(emails, list):
+            print("Batched email drafts were not in the expected format")
+            return drafts
+        
+        for item in emails:
+            if not isinstance(item, dict):
+                continue
+            idx = item.get('idx')
+            body = item.get('body')
+            subject = item.get('subject')
+            if (not isinstance(idx, int) or isinstance(idx, bool) or not 0 <= idx < len(jobs)
+                    or not isinstance(body, str) or not body.strip()
+                    or not isinstance(subject, (str, type(None)))):
+                continue
+            drafts[idx] = {
+                'subject': subject or self._default_subject(jobs[idx]),
+                'email': body.strip()
+            }
+            self._store_cached_draft(candidate_prefix, jobs[idx], "professional", drafts[idx])
+        
+        return drafts
+    
+    def _default_subject(self, job: Dict) -> str:
+        """Subject line used when the draft does not provide one"""
+        return f"Application for {job.get('title', 'Position')} at {job.get('company', 'Company')}"
     
     def _draft_with_template(self, user_profile: Dict, job: Dict) -> str:
         """Draft email using a template (fallback when AI is not available)"""
@@ -125,14 +327,41 @@ Best regards,
         Returns:
             List of dictionaries with job info and drafted email
         """
+        selected_jobs = jobs[:limit]
+        
+        if self.client and self.api_key:
+            # Built once here and shared by the cache lookups and every request
+            candidate_prefix = self._candidate_prefix(user_profile)
+            drafts = [self._get_cached_draft(candidate_prefix, job, "professional") for job in selected_jobs]
+            
+            # Only jobs without a cached draft need a request
+            pending = [i for i, draft in enumerate(drafts) if draft is None]
+            if pending:
+                batch_drafts = self._draft_batch_with_ai(candidate_prefix, [selected_jobs[i] for i in pending])
+                for i, draft in zip(pending, batch_drafts):
+                    drafts[i] = draft
+            
+            # Draft anything the batched request missed individually
+            missing = [i for i, draft in enumerate(drafts) if draft is None]
+            if missing:
+                email_texts = asyncio.run(self._draft_multiple_emails_async(
+                    user_profile, candidate_prefix, [selected_jobs[i] for i in missing]
+                ))
+                for i, email_text in zip(missing, email_texts):
+                    drafts[i] = {'subject': self._default_subject(selected_jobs[i]), 'email': email_text}
+        else:
+            drafts = [
+                {'subject': self._default_subject(job), 'email': self._draft_with_template(user_profile, job)}
+                for job in selected_jobs
+            ]
+        
         drafted_emails = []
         
-        for job in jobs[:limit]:
-            email_text = self.draft_cold_email(user_profile, job)
+        for job, draft in zip(selected_jobs, drafts):
             drafted_emails.append({
                 'job': job,
-                'email': email_text,
-                'subject': f"Application for {job.get('title', 'Position')} at {job.get('company', 'Company')}"
+                'email': draft['email'],
+                'subject': draft['subject']
             })
         
         return drafted_emails
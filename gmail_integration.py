@@ -3,23 +3,32 @@ Gmail Integration Module
 Connects to Gmail API to create email drafts
 """
 import os
-import pickle
-from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 import base64
-from email.mime.text import MIMEText
+import re
+from email.header import Header
 from typing import List, Dict
 
 
+# Line breaks as mail understands them; str.splitlines() would also split on
+# form feeds, vertical tabs and Unicode separators inside the text
+LINE_BREAK = re.compile(r'\r\n|\r|\n')
+
+
 class GmailIntegration:
     """Integrates with Gmail API to create email drafts"""
     
-    # If modifying these scopes, delete the file token.pickle.
+    # If modifying these scopes, delete the file token.json.
     SCOPES = ['https://www.googleapis.com/auth/gmail.compose']
     
+    # RFC 5322 limit on the length of a line, excluding the CRLF
+    MAX_LINE_OCTETS = 998
+    
+    # Gmail accepts up to 100 calls per batch but recommends no more than 50
+    MAX_BATCH_SIZE = 50
+    
     def __init__(self, credentials_path: str = 'credentials.json'):
         """
         Initialize Gmail integration
@@ -35,14 +44,16 @@ class GmailIntegration:
         """Authenticate with Gmail API"""
         creds = None
         
-        # The file token.pickle stores the user's access and refresh tokens
-        if os.path.exists('token.pickle'):
-            with open('token.pickle', 'rb') as token:
-                creds = pickle.load(token)
+        # The file token.json stores the user's access and refresh tokens
+        if os.path.exists('token.json'):
+            creds = Credentials.from_authorized_user_file('token.json', self.SCOPES)
         
         # If there are no (valid) credentials available, let the user log in
         if not creds or not creds.valid:
+            # The refresh transport and OAuth flow modules are only imported on
+            # the branches that need them; a valid cached token needs neither
             if creds and creds.expired and creds.refresh_token:
+                from google.auth.transport.requests import Request
                 creds.refresh(Request())
             else:
                 if not os.path.exists(self.credentials_path):
@@ -51,16 +62,20 @@ class GmailIntegration:
                     print("See README.md for instructions")
                     return
                 
+                from google_auth_oauthlib.flow import InstalledAppFlow
                 flow = InstalledAppFlow.from_client_secrets_file(
                     self.credentials_path, self.SCOPES)
                 creds = flow.run_local_server(port=0)
             
             # Save the credentials for the next run
-            with open('token.pickle', 'wb') as token:
-                pickle.dump(creds, token)
+            with open('token.json', 'w') as token:
+                token.write(creds.to_json())
         
         try:
-            self.service = build('gmail', 'v1', credentials=creds)
+            # Use the discovery document bundled with the client library
+            # instead of fetching it over HTTP on every run
+            self.service = build('gmail', 'v1', credentials=creds,
+                                 static_discovery=True, cache_discovery=False)
             print("Successfully authenticated with Gmail API")
         except Exception as e:
             print(f"Error building Gmail service: {e}")
@@ -82,18 +97,7 @@ class GmailIntegration:
             return {'error': 'Service not initialized'}
         
         try:
-            message = MIMEText(body)
-            message['to'] = to
-            message['subject'] = subject
-            
-            # Encode the message
-            encoded_message = base64.urlsafe_b64encode(message.as_bytes()).decode()
-            
-            create_message = {
-                'message': {
-                    'raw': encoded_message
-                }
-            }
+            create_message = self._build_draft_body(to, subject, body)
             
             # Create the draft
             draft = self.service.users().drafts().create(
@@ -116,36 +120,135 @@ class GmailIntegration:
             print(f"Error creating draft: {e}")
             return {'error': str(e)}
     
+    def _build_draft_body(self, to: str, subject: str, body: str) -> Dict:
+        """
+        Build the request body for drafts().create from a plain-text email
+        
+        The RFC 2822 message is formatted directly instead of going through
+        MIMEText, whose policy and generator machinery is most of the cost of
+        preparing a draft.
+        """
+        # Header values must stay on one line; only non-ASCII subjects need
+        # RFC 2047 encoding
+        to = LINE_BREAK.sub(' ', to).strip()
+        subject = LINE_BREAK.sub(' ', subject).strip()
+        if not subject.isascii():
+            subject = Header(subject, 'utf-8').encode(linesep='\r\n')
+        
+        # The body goes out as 8bit text unless a line is too long for that,
+        # e.g. an AI-drafted paragraph with no line breaks
+        lines = LINE_BREAK.split(body)
+        content = "\r\n".join(lines)
+        if all(len(line.encode('utf-8')) <= self.MAX_LINE_OCTETS for line in lines):
+            transfer_encoding = '8bit'
+        else:
+            transfer_encoding = 'base64'
+            content = base64.encodebytes(content.encode('utf-8')).decode('ascii').replace('\n', '\r\n')
+        
+        raw_message = (
+            f"To: {to}\r\n"
+            f"Subject: {subject}\r\n"
+            "MIME-Version: 1.0\r\n"
+            'Content-Type: text/plain; charset="utf-8"\r\n'
+            f"Content-Transfer-Encoding: {transfer_encoding}\r\n"
+            "\r\n"
+            + content
+        )
+        
+        # Encode the message
+        encoded_message = base64.urlsafe_b64encode(raw_message.encode('utf-8')).decode()
+        
+        return {
+            'message': {
+                'raw': encoded_message
+            }
+        }
+    
     def create_multiple_drafts(self, drafted_emails: List[Dict]) -> List[Dict]:
         """
         Create multiple email drafts in Gmail
         
+        Drafts are sent as batch requests, so each batch of up to
+        MAX_BATCH_SIZE drafts costs a single HTTP round trip.
+        
         Args:
             drafted_emails: List of drafted email dictionaries
             
         Returns:
             List of draft creation results
         """
-        results = []
+        if not self.service:
+            print("Gmail service not initialized. Cannot create draft.")
+            results = [{'error': 'Service not initialized'} for _ in drafted_emails]
+        else:
+            results = self._create_drafts_in_batches(drafted_emails)
+        
+        for email_data, result in zip(drafted_emails, results):
+            job = email_data.get('job', {})
+            result['job_title'] = job.get('title', 'Unknown')
+            result['company'] = job.get('company', 'Unknown')
+        
+        return results
+    
+    def _create_drafts_in_batches(self, drafted_emails: List[Dict]) -> List[Dict]:
+        """Create drafts through batch requests, returning results in input order"""
+        results = [None] * len(drafted_emails)
+        messages = []
         
         for email_data in drafted_emails:
             job = email_data.get('job', {})
-            email_text = email_data.get('email', '')
-            subject = email_data.get('subject', 'Job Application')
             
             # For cold emails, you might want to find the hiring manager's email
             # For now, we'll use a placeholder
             recipient = job.get('recruiter_email', 'hiring@company.com')
+            subject = email_data.get('subject', 'Job Application')
+            messages.append((recipient, subject, email_data.get('email', '')))
+        
+        def callback(request_id, response, exception):
+            index = int(request_id)
+            recipient, subject, _ = messages[index]
+            if exception is not None:
+                print(f"An error occurred: {exception}")
+                results[index] = {'error': str(exception)}
+            else:
+                print(f"Draft created with ID: {response['id']}")
+                results[index] = {
+                    'id': response['id'],
+                    'subject': subject,
+                    'to': recipient,
+                    'status': 'created'
+                }
+        
+        for start in range(0, len(messages), self.MAX_BATCH_SIZE):
+            indexes = range(start, min(start + self.MAX_BATCH_SIZE, len(messages)))
+            batch = self.service.new_batch_http_request(callback=callback)
+            queued = 0
             
-            result = self.create_draft(
-                to=recipient,
-                subject=subject,
-                body=email_text
-            )
+            for index in indexes:
+                # A bad email only fails its own draft, not the whole batch
+                try:
+                    body = self._build_draft_body(*messages[index])
+                except Exception as e:
+                    print(f"Error creating draft: {e}")
+                    results[index] = {'error': str(e)}
+                    continue
+                
+                batch.add(
+                    self.service.users().drafts().create(userId='me', body=body),
+                    request_id=str(index)
+                )
+                queued += 1
             
-            result['job_title'] = job.get('title', 'Unknown')
-            result['company'] = job.get('company', 'Unknown')
-            results.append(result)
+            if not queued:
+                continue
+            
+            try:
+                batch.execute()
+            except Exception as e:
+                print(f"Error creating drafts: {e}")
+                for index in indexes:
+                    if results[index] is None:
+                        results[index] = {'error': str(e)}
         
         return results
     
@@ -175,12 +278,29 @@ class GmailIntegration:
                 print('No drafts found.')
                 return []
             
+            # Fetch the drafts' details with batch requests instead of one call each
+            draft_details = {}
+            
+            def callback(request_id, response, exception):
+                if exception is not None:
+                    print(f"An error occurred: {exception}")
+                else:
+                    draft_details[request_id] = response
+            
+            for start in range(0, len(drafts), self.MAX_BATCH_SIZE):
+                batch = self.service.new_batch_http_request(callback=callback)
+                for draft in drafts[start:start + self.MAX_BATCH_SIZE]:
+                    batch.add(
+                        self.service.users().drafts().get(userId='me', id=draft['id']),
+                        request_id=draft['id']
+                    )
+                batch.execute()
+            
             draft_list = []
             for draft in drafts:
-                draft_data = self.service.users().drafts().get(
-                    userId='me',
-                    id=draft['id']
-                ).execute()
+                draft_data = draft_details.get(draft['id'])
+                if draft_data is None:
+                    continue
                 
                 message = draft_data['message']
                 subject = None
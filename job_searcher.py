@@ -2,25 +2,35 @@
 Job Search Module
 Searches for startup jobs matching user's profile and location
 """
-import requests
+import asyncio
+import heapq
+import aiohttp
 from typing import List, Dict
 from bs4 import BeautifulSoup
 import re
 
 
+# Words in a job posting, keeping characters used in skill names (C++, C#, Node.js)
+TOKEN_PATTERN = re.compile(r'[a-z0-9+#.]+')
+
+
 class JobSearcher:
     """Searches for startup jobs based on user profile and preferences"""
     
+    # Seconds to wait for a single job source before skipping it
+    SOURCE_TIMEOUT = 3.0
+    
     def __init__(self):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
     
-    def search_angellist_jobs(self, skills: List[str], location: str, limit: int = 10) -> List[Dict]:
+    async def search_angellist_jobs(self, session: aiohttp.ClientSession, skills: List[str], location: str, limit: int = 10) -> List[Dict]:
         """
         Search for jobs on AngelList/Wellfound
         
         Args:
+            session: Shared HTTP session for the current search run
             skills: List of user's skills
             location: Job location
             limit: Maximum number of jobs to return
@@ -47,11 +57,12 @@ class JobSearcher:
         
         return jobs[:limit]
     
-    def search_ycombinator_jobs(self, skills: List[str], location: str, limit: int = 10) -> List[Dict]:
+    async def search_ycombinator_jobs(self, session: aiohttp.ClientSession, skills: List[str], location: str, limit: int = 10) -> List[Dict]:
         """
         Search for jobs from Y Combinator startups
         
         Args:
+            session: Shared HTTP session for the current search run
             skills: List of user's skills
             location: Job location
             limit: Maximum number of jobs to return
@@ -80,11 +91,12 @@ class JobSearcher:
         
         return jobs[:limit]
     
-    def search_general_startup_jobs(self, skills: List[str], location: str, limit: int = 10) -> List[Dict]:
+    async def search_general_startup_jobs(self, session: aiohttp.ClientSession, skills: List[str], location: str, limit: int = 10) -> List[Dict]:
         """
         Search for startup jobs from various sources
         
         Args:
+            session: Shared HTTP session for the current search run
             skills: List of user's skills
             location: Job location
             limit: Maximum number of jobs to return
@@ -121,6 +133,21 @@ class JobSearcher:
         
         return jobs[:limit]
     
+    def _create_session(self) -> aiohttp.ClientSession:
+        """
+        Create the HTTP session shared by every source during a search run
+        
+        The pooled connector keeps connections to job boards alive between
+        requests and caches DNS lookups, so only the first request to a host
+        pays for the TCP/TLS handshake.
+        """
+        connector = aiohttp.TCPConnector(limit=20, ttl_dns_cache=300)
+        return aiohttp.ClientSession(
+            headers=self.headers,
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=10)
+        )
+    
     def find_matching_jobs(self, user_profile: Dict, location: str, max_jobs: int = 20) -> List[Dict]:
         """
         Find jobs matching user's profile
@@ -133,39 +160,118 @@ class JobSearcher:
         Returns:
             List of matching job listings
         """
+        return asyncio.run(self._find_matching_jobs_async(user_profile, location, max_jobs))
+    
+    async def _find_matching_jobs_async(self, user_profile: Dict, location: str, max_jobs: int) -> List[Dict]:
+        """Query all job sources concurrently and rank the combined results"""
         all_jobs = []
         skills = user_profile.get('skills', [])
         
-        # Search multiple sources
-        all_jobs.extend(self.search_angellist_jobs(skills, location, limit=7))
-        all_jobs.extend(self.search_ycombinator_jobs(skills, location, limit=7))
-        all_jobs.extend(self.search_general_startup_jobs(skills, location, limit=6))
+        # Search multiple sources in parallel, sharing one session across them
+        async with self._create_session() as session:
+            results = await asyncio.gather(
+                self._with_timeout('AngelList', self.search_angellist_jobs(session, skills, location, limit=7)),
+                self._with_timeout('Y Combinator', self.search_ycombinator_jobs(session, skills, location, limit=7)),
+                self._with_timeout('general', self.search_general_startup_jobs(session, skills, location, limit=6)),
+                return_exceptions=True
+            )
+        
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"Error searching job source: {result}")
+                continue
+            all_jobs.extend(result)
+        
+        # Drop cross-posted duplicates before doing any scoring work
+        all_jobs = self._deduplicate_jobs(all_jobs)
         
         # Score and rank jobs based on skill match
-        scored_jobs = self._score_jobs(all_jobs, skills)
+        return self._score_jobs(all_jobs, skills, limit=max_jobs)
+    
+    async def _with_timeout(self, source: str, search) -> List[Dict]:
+        """
+        Await a job source, giving up on it after SOURCE_TIMEOUT seconds
         
-        return scored_jobs[:max_jobs]
+        A slow source then only costs its own results instead of holding
+        up the whole search.
+        """
+        try:
+            return await asyncio.wait_for(search, timeout=self.SOURCE_TIMEOUT)
+        except asyncio.TimeoutError:
+            print(f"Skipping {source} job search: no response after {self.SOURCE_TIMEOUT:g}s")
+            return []
     
-    def _score_jobs(self, jobs: List[Dict], user_skills: List[str]) -> List[Dict]:
+    def _deduplicate_jobs(self, jobs: List[Dict]) -> List[Dict]:
+        """
+        Remove jobs posted on more than one source
+        
+        Args:
+            jobs: List of job listings
+            
+        Returns:
+            Jobs with duplicates removed, keeping the first occurrence
+        """
+        seen = set()
+        deduped = []
+        
+        for job in jobs:
+            key = (
+                job.get('company', '').strip().lower(),
+                re.sub(r'[^a-z0-9]', '', job.get('title', '').lower())
+            )
+            if key in seen:
+                continue
+            seen.add(key)
+            deduped.append(job)
+        
+        return deduped
+    
+    def _compile_phrase_pattern(self, phrases: List[str]):
+        """
+        Compile a single regex matching any of the given lowercase phrases
+        
+        Phrases only match as whole words, so "data analysis" does not match
+        inside "metadata analysis". Longer phrases are tried first.
+        """
+        if not phrases:
+            return None
+        
+        alternation = '|'.join(re.escape(phrase) for phrase in sorted(phrases, key=len, reverse=True))
+        return re.compile(r'(?<![a-z0-9])(?:' + alternation + r')(?![a-z0-9])')
+    
+    def _score_jobs(self, jobs: List[Dict], user_skills: List[str], limit: int = None) -> List[Dict]:
         """
         Score and rank jobs based on skill match
         
         Args:
             jobs: List of job listings
             user_skills: User's skills
+            limit: Only return this many of the best matches (all jobs if None)
             
         Returns:
             Sorted list of jobs with match scores
         """
+        # Lowercase the skills once; single-token skills are looked up in each
+        # job's token set, anything else (e.g. "REST API") is matched by one
+        # compiled alternation so each job's text is scanned a single time
+        skill_set = {skill.lower().strip() for skill in user_skills if skill and skill.strip()}
+        phrase_skills = [skill for skill in skill_set if not TOKEN_PATTERN.fullmatch(skill)]
+        word_skills = skill_set.difference(phrase_skills)
+        phrase_pattern = self._compile_phrase_pattern(phrase_skills)
+        
         for job in jobs:
-            score = 0
             job_text = f"{job['title']} {job['description']}".lower()
+            tokens = {token.rstrip('.') for token in TOKEN_PATTERN.findall(job_text)}
             
-            for skill in user_skills:
-                if skill.lower() in job_text:
-                    score += 1
+            score = len(word_skills & tokens)
+            if phrase_pattern:
+                score += len(set(phrase_pattern.findall(job_text)))
             
             job['match_score'] = score
         
-        # Sort by match score (descending)
-        return sorted(jobs, key=lambda x: x.get('match_score', 0), reverse=True)
+        # Select the top matches by score (descending); nlargest only keeps
+        # `limit` items on its heap instead of sorting the whole pool, and is
+        # stable like sorted() so ties keep their source order
+        if limit is None:
+            limit = len(jobs)
+        return heapq.nlargest(limit, jobs, key=lambda x: x.get('match_score', 0))
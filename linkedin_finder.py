@@ -2,19 +2,86 @@
 LinkedIn Profile Finder Module
 Searches for user's LinkedIn profile and extracts additional information
 """
-import requests
-from bs4 import BeautifulSoup
-from typing import Dict, Optional
+import asyncio
+import atexit
+import shelve
+import time
+import httpx
+import lxml.html
+from bs4 import BeautifulSoup, SoupStrainer
+from lxml import etree
+from typing import Dict, List, Optional
 import re
 
 
+# Profile URL embedded in a search result link
+LINKEDIN_URL_PATTERN = re.compile(r'(https://[a-z]{2,3}\.linkedin\.com/in/[^&]+)')
+
+# Class names of the headline and location elements on a public profile
+HEADLINE_CLASS_PATTERN = re.compile('headline|subtitle')
+LOCATION_CLASS_PATTERN = re.compile('location|region')
+
+# Only these tags (and their contents) are built into the profile page tree
+PROFILE_ELEMENTS = SoupStrainer(['h2', 'span'])
+
+
 class LinkedInFinder:
     """Finds and extracts information from LinkedIn profiles"""
     
+    # hrefs of every link pointing at a LinkedIn profile, evaluated in C by lxml
+    LINKEDIN_HREFS = etree.XPath("//a[contains(@href, 'linkedin.com/in/')]/@href", smart_strings=False)
+    
+    # The organic results come first, so only the top of a search page is read
+    MAX_SEARCH_BYTES = 256 * 1024
+    
+    # Profile URLs found by earlier runs, keyed by search query, reused for a week
+    CACHE_PATH = '.linkedin_cache.db'
+    CACHE_TTL = 7 * 24 * 60 * 60
+    
+    # Candidates looked up at the same time by enrich_profiles
+    MAX_CONCURRENT_LOOKUPS = 20
+    
+    # Seconds to wait for each GitHub/Twitter profile probe
+    PROBE_TIMEOUT = 5.0
+    
     def __init__(self):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
+        # One pooled HTTP/2 client for all lookups, so repeated requests to the
+        # same host reuse the connection instead of redoing the TLS handshake
+        self.client = httpx.Client(
+            http2=True,
+            headers=self.headers,
+            timeout=10.0,
+            follow_redirects=True,
+            limits=httpx.Limits(max_keepalive_connections=16)
+        )
+        self._search_cache: Dict[str, str] = {}
+        self._disk_cache = None
+    
+    def close(self):
+        """Close the pooled HTTP connections and the search cache"""
+        self.client.close()
+        if self._disk_cache is not None:
+            self._disk_cache.close()
+            self._disk_cache = None
+    
+    def _open_cache(self):
+        """Open the on-disk search cache the first time it is needed"""
+        if self._disk_cache is None:
+            try:
+                self._disk_cache = shelve.open(self.CACHE_PATH)
+                atexit.register(self._disk_cache.close)
+            except Exception as e:
+                print(f"Warning: Could not open LinkedIn search cache: {e}")
+        return self._disk_cache
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
     
     def search_profile(self, name: str, additional_info: str = "") -> Optional[str]:
         """
@@ -27,26 +94,83 @@ class LinkedInFinder:
         Returns:
             LinkedIn profile URL if found
         """
-        query = f"{name} {additional_info} site:linkedin.com/in/"
-        search_url = f"https://www.google.com/search?q={query.replace(' ', '+')}"
+        query = self._search_query(name, additional_info)
+        cached = self._get_cached_search(query)
+        if cached:
+            return cached
         
+        profile_url = self._search_google(query)
+        self._store_cached_search(query, profile_url)
+        return profile_url
+    
+    def _search_query(self, name: str, additional_info: str) -> str:
+        """Build the Google query for a person's LinkedIn profile"""
+        return f"{name} {additional_info} site:linkedin.com/in/"
+    
+    def _search_url(self, query: str) -> str:
+        """Google search URL for a query"""
+        return f"https://www.google.com/search?q={query.replace(' ', '+')}"
+    
+    def _get_cached_search(self, query: str) -> Optional[str]:
+        """Return a profile URL found for this query earlier, if any"""
+        if query in self._search_cache:
+            return self._search_cache[query]
+        disk_cache = self._open_cache()
+        if disk_cache is None or query not in disk_cache:
+            return None
+        
+        # Entries expire when read, so a wrong match doesn't stick forever
+        entry = disk_cache[query]
+        if not isinstance(entry, dict) or entry['cached_at'] < time.time() - self.CACHE_TTL:
+            del disk_cache[query]
+            return None
+        self._search_cache[query] = entry['url']
+        return entry['url']
+    
+    def _store_cached_search(self, query: str, profile_url: Optional[str]):
+        """
+        Remember a found profile in memory and across runs
+        
+        Misses are not cached, since a captcha or rate-limit page looks the
+        same as a search with no results.
+        """
+        if not profile_url:
+            return
+        self._search_cache[query] = profile_url
+        disk_cache = self._open_cache()
+        if disk_cache is not None:
+            disk_cache[query] = {'url': profile_url, 'cached_at': time.time()}
+    
+    def _search_google(self, query: str) -> Optional[str]:
+        """Run a Google search and return the first LinkedIn profile URL in it"""
         try:
-            response = requests.get(search_url, headers=self.headers, timeout=10)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Look for LinkedIn URLs in search results
-            for link in soup.find_all('a'):
-                href = link.get('href', '')
-                if 'linkedin.com/in/' in href:
-                    # Extract the actual LinkedIn URL
-                    match = re.search(r'(https://[a-z]{2,3}\.linkedin\.com/in/[^&]+)', href)
-                    if match:
-                        return match.group(1)
+            chunks = []
+            received = 0
+            with self.client.stream('GET', self._search_url(query)) as response:
+                response.raise_for_status()
+                for chunk in response.iter_bytes(64 * 1024):
+                    chunks.append(chunk)
+                    received += len(chunk)
+                    if received >= self.MAX_SEARCH_BYTES:
+                        break
+            return self._parse_search_results(b''.join(chunks))
         except Exception as e:
             print(f"Error searching for LinkedIn profile: {e}")
         
         return None
     
+    def _parse_search_results(self, content: bytes) -> Optional[str]:
+        """Return the first LinkedIn profile URL linked from a search results page"""
+        tree = lxml.html.fromstring(content)
+        
+        # Look for LinkedIn URLs in search results
+        for href in self.LINKEDIN_HREFS(tree):
+            # Extract the actual LinkedIn URL
+            match = LINKEDIN_URL_PATTERN.search(href)
+            if match:
+                return match.group(1)
+        return None
+    
     def get_profile_info(self, linkedin_url: str) -> Dict:
         """
         Extract public information from LinkedIn profile
@@ -68,19 +192,19 @@ class LinkedInFinder:
         }
         
         try:
-            response = requests.get(linkedin_url, headers=self.headers, timeout=10)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            response = self.client.get(linkedin_url)
+            soup = BeautifulSoup(response.content, 'lxml', parse_only=PROFILE_ELEMENTS)
             
             # Extract basic info from public profile
             # Note: LinkedIn's structure changes frequently and scraping is limited
             
             # Try to find headline
-            headline_element = soup.find('h2', class_=re.compile('headline|subtitle'))
+            headline_element = soup.find('h2', class_=HEADLINE_CLASS_PATTERN)
             if headline_element:
                 profile_info['headline'] = headline_element.text.strip()
             
             # Try to find location
-            location_element = soup.find('span', class_=re.compile('location|region'))
+            location_element = soup.find('span', class_=LOCATION_CLASS_PATTERN)
             if location_element:
                 profile_info['location'] = location_element.text.strip()
                 
@@ -100,44 +224,139 @@ class LinkedInFinder:
         Returns:
             Dictionary with found online profiles
         """
-        online_presence = {
-            'github': None,
-            'twitter': None,
-            'personal_website': None
-        }
+        github_possibilities, twitter_possibilities = self._presence_candidates(name, email)
+        statuses = asyncio.run(self._probe_urls(github_possibilities + twitter_possibilities))
+        return self._pick_presence(github_possibilities, twitter_possibilities, statuses)
+    
+    def _presence_candidates(self, name: str, email: str):
+        """
+        Guess GitHub and Twitter profile URLs from a name and email
         
+        Returns:
+            Tuple of (GitHub candidates, Twitter candidates), most likely first
+        """
         # Extract username from email
         username = email.split('@')[0] if email else ''
         
-        # Search for GitHub
+        # Candidate GitHub profiles
         github_possibilities = [
             f"https://github.com/{username}",
             f"https://github.com/{name.lower().replace(' ', '-')}",
             f"https://github.com/{name.lower().replace(' ', '')}"
         ]
         
-        for github_url in github_possibilities:
-            try:
-                response = requests.head(github_url, timeout=5)
-                if response.status_code == 200:
-                    online_presence['github'] = github_url
-                    break
-            except requests.RequestException:
-                continue
-        
-        # Search for Twitter
+        # Candidate Twitter profiles
         twitter_possibilities = [
             f"https://twitter.com/{username}",
             f"https://twitter.com/{name.lower().replace(' ', '')}"
         ]
         
-        for twitter_url in twitter_possibilities:
-            try:
-                response = requests.head(twitter_url, timeout=5)
-                if response.status_code == 200:
-                    online_presence['twitter'] = twitter_url
-                    break
-            except requests.RequestException:
-                continue
-        
-        return online_presence
+        return github_possibilities, twitter_possibilities
+    
+    def _pick_presence(self, github_possibilities: List[str], twitter_possibilities: List[str],
+                       statuses: Dict[str, Optional[int]]) -> Dict[str, str]:
+        """The first candidate (in order) that answered 200 wins for each platform"""
+        return {
+            'github': next(
+                (url for url in github_possibilities if statuses.get(url) == 200), None
+            ),
+            'twitter': next(
+                (url for url in twitter_possibilities if statuses.get(url) == 200), None
+            ),
+            'personal_website': None
+        }
+    
+    async def _probe_urls(self, urls: List[str]) -> Dict[str, Optional[int]]:
+        """
+        Send HEAD requests to all URLs concurrently
+        
+        Args:
+            urls: Candidate profile URLs
+            
+        Returns:
+            Dictionary mapping each URL to its status code (None if the request failed)
+        """
+        async with self._async_client() as client:
+            return await self._head_statuses(client, urls)
+    
+    async def _head_statuses(self, client: httpx.AsyncClient, urls: List[str]) -> Dict[str, Optional[int]]:
+        """HEAD every URL once on the given client, without following redirects"""
+        unique_urls = list(dict.fromkeys(urls))
+        results = await asyncio.gather(
+            *[client.head(url, timeout=self.PROBE_TIMEOUT) for url in unique_urls],
+            return_exceptions=True
+        )
+        
+        return {
+            url: None if isinstance(result, BaseException) else result.status_code
+            for url, result in zip(unique_urls, results)
+        }
+    
+    def _async_client(self) -> httpx.AsyncClient:
+        """Pooled HTTP/2 client for concurrent profile probes"""
+        return httpx.AsyncClient(
+            http2=True,
+            headers=self.headers,
+            timeout=self.PROBE_TIMEOUT,
+            limits=httpx.Limits(max_connections=32)
+        )
+    
+    def enrich_profiles(self, candidates: List[Dict]) -> List[Dict]:
+        """
+        Find LinkedIn profiles and online presence for several people at once
+        
+        The LinkedIn search runs for candidates with a 'name' but no
+        'linkedin_url', and the GitHub/Twitter probes for candidates with both
+        a 'name' and an 'email'.
+        
+        Args:
+            candidates: Profiles with 'name' and optionally 'email' and 'linkedin_url'
+            
+        Returns:
+            One dictionary per candidate, in order, with 'linkedin_url' and
+            'online_presence' (None where the lookup was skipped or found nothing)
+        """
+        return asyncio.run(self._enrich_profiles_async(candidates))
+    
+    async def _enrich_profiles_async(self, candidates: List[Dict]) -> List[Dict]:
+        """Look up all candidates, a bounded number at a time, probing on one shared client"""
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_LOOKUPS)
+        
+        async with self._async_client() as client:
+            return await asyncio.gather(
+                *[self._enrich_profile_async(client, semaphore, candidate) for candidate in candidates]
+            )
+    
+    async def _enrich_profile_async(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore,
+                                    candidate: Dict) -> Dict:
+        """Run the LinkedIn search and presence probes for one candidate together"""
+        name = candidate.get('name')
+        email = candidate.get('email')
+        
+        async def find_linkedin():
+            if candidate.get('linkedin_url') or not name:
+                return None
+            query = self._search_query(name, email or '')
+            cached = self._get_cached_search(query)
+            if cached:
+                return cached
+            # The search itself runs on the pooled sync client in a worker
+            # thread; the cache is only touched from the event loop thread
+            profile_url = await asyncio.to_thread(self._search_google, query)
+            self._store_cached_search(query, profile_url)
+            return profile_url
+        
+        async def find_presence():
+            if not (name and email):
+                return None
+            github_possibilities, twitter_possibilities = self._presence_candidates(name, email)
+            statuses = await self._head_statuses(client, github_possibilities + twitter_possibilities)
+            return self._pick_presence(github_possibilities, twitter_possibilities, statuses)
+        
+        async with semaphore:
+            linkedin_url, online_presence = await asyncio.gather(find_linkedin(), find_presence())
+        
+        return {
+            'linkedin_url': linkedin_url,
+            'online_presence': online_presence
+        }
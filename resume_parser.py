@@ -2,54 +2,211 @@
 Resume Parser Module
 Extracts information from PDF resumes
 """
-import pypdf
+import copy
+import functools
+import os
+import pypdfium2 as pdfium
 import re
-from typing import Dict, List
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, Iterator, List
+
+
+def _iter_pages(pdf, start: int, stop: int) -> Iterator[str]:
+    """Yield the text of pages [start, stop) of an open PDF document"""
+    for index in range(start, stop):
+        page = pdf[index]
+        textpage = page.get_textpage()
+        text = textpage.get_text_range()
+        textpage.close()
+        page.close()
+        yield text
+
+
+def _extract_page_range(pdf_path: str, start: int, stop: int) -> str:
+    """Worker for parallel extraction; opens its own copy of the document"""
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        return "\n".join(_iter_pages(pdf, start, stop))
+    finally:
+        pdf.close()
 
 
 class ResumeParser:
     """Parses resume files and extracts key information"""
     
+    # Each worker process is given at least this many pages. Starting the pool
+    # and reopening the PDF costs roughly what reading 10 pages does, so only
+    # documents of 2 * PARALLEL_PAGE_THRESHOLD pages or more are split
+    PARALLEL_PAGE_THRESHOLD = 50
+    MAX_PDF_WORKERS = 4
+    
+    # Longest experience summary passed on to the email prompt
+    MAX_EXPERIENCE_CHARS = 4000
+    
+    # Number of parsed resumes kept in memory per parser
+    PARSE_CACHE_SIZE = 128
+    
     def __init__(self):
-        self.email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        self.phone_pattern = r'(\+\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'
-        self.linkedin_pattern = r'linkedin\.com/in/[\w-]+'
+        self._parse_cached = functools.lru_cache(maxsize=self.PARSE_CACHE_SIZE)(self._parse_version)
+        
+        # Compiled once so repeated parses reuse them
+        self.email_pattern = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+        self.phone_pattern = re.compile(r'(\+\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}')
+        self.linkedin_pattern = re.compile(r'linkedin\.com/in/[\w-]+', re.IGNORECASE)
+        
+        self.skills_list = [
+            'Python', 'Java', 'JavaScript', 'React', 'Node.js', 'SQL', 'AWS',
+            'Docker', 'Kubernetes', 'Git', 'Machine Learning', 'AI', 'Django',
+            'Flask', 'Angular', 'Vue.js', 'TypeScript', 'MongoDB', 'PostgreSQL',
+            'Redis', 'Kafka', 'REST API', 'GraphQL', 'Microservices', 'Agile',
+            'TensorFlow', 'PyTorch', 'Data Analysis', 'Excel', 'Tableau',
+            'Leadership', 'Project Management', 'Communication', 'Problem Solving'
+        ]
+        # One case-insensitive pass over the text finds every listed skill.
+        # Each skill gets its own group, so a match maps back to its listed
+        # spelling by group number rather than by re-casing the matched text
+        # (which differs for characters like the dotted capital I).
+        self._skills_by_group = sorted(self.skills_list, key=len, reverse=True)
+        alternation = '|'.join(f'({re.escape(skill)})' for skill in self._skills_by_group)
+        self._skills_pattern = re.compile(rf'\b(?:{alternation})\b', re.IGNORECASE)
+        
+        # A line with more than three characters once surrounding whitespace is stripped
+        self._name_line = re.compile(r'^[^\S\n]*(\S[^\n]{2,}\S)[^\S\n]*$', re.MULTILINE)
+        
+        # Everything after the first experience heading line, up to the first
+        # line that names the next section. Later lines that mention an
+        # experience keyword ("Volunteer Experience", "Employment: full-time")
+        # neither end the section nor belong to it.
+        experience_keywords = 'EXPERIENCE|WORK HISTORY|EMPLOYMENT|PROFESSIONAL EXPERIENCE'
+        self._experience_section = re.compile(
+            rf'^[^\n]*(?:{experience_keywords})[^\n]*(?:\n|\Z)'
+            r'(.*?)'
+            rf'(?=^(?![^\n]*(?:{experience_keywords}))[^\n]*(?:EDUCATION|SKILLS|PROJECTS|CERTIFICATIONS)|\Z)',
+            re.IGNORECASE | re.MULTILINE | re.DOTALL
+        )
+        self._experience_keyword_line = re.compile(
+            rf'^[^\n]*(?:{experience_keywords})[^\n]*$', re.IGNORECASE | re.MULTILINE
+        )
+        # Whitespace spanning a line break, i.e. the gap between two stripped lines
+        self._line_break = re.compile(r'\s*\n\s*')
         
     def extract_text_from_pdf(self, pdf_path: str) -> str:
         """Extract text content from PDF file"""
-        text = ""
+        return "\n".join(self._iter_text(pdf_path))
+    
+    def _iter_text(self, pdf_path: str) -> Iterator[str]:
+        """
+        Yield the text of a PDF file in page order
+        
+        Resumes are read one page at a time; only very long documents are
+        split into page ranges that arrive as one chunk per worker process.
+        Read errors are reported and end the stream early.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            
+        Yields:
+            Consecutive pieces of the document text
+        """
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = pypdf.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text()
+            # Opened by path so PDFium reads objects from disk as pages need
+            # them rather than loading the whole file into memory
+            pdf = pdfium.PdfDocument(pdf_path)
+            try:
+                page_count = len(pdf)
+                workers = min(
+                    os.cpu_count() or 1,
+                    page_count // self.PARALLEL_PAGE_THRESHOLD,
+                    self.MAX_PDF_WORKERS
+                )
+                if workers < 2:
+                    yield from _iter_pages(pdf, 0, page_count)
+                    return
+            finally:
+                pdf.close()
+            yield from self._iter_pages_in_parallel(pdf_path, page_count, workers)
         except Exception as e:
             print(f"Error reading PDF: {e}")
-        return text
+    
+    def _iter_pages_in_parallel(self, pdf_path: str, page_count: int, workers: int) -> Iterator[str]:
+        """
+        Extract text from a long PDF using one process per page range
+        
+        PDFium is not thread-safe, so pages are split into contiguous ranges
+        and each worker process opens the document itself.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            page_count: Number of pages in the document
+            workers: Number of worker processes
+            
+        Yields:
+            Text of each page range, in page order
+        """
+        step = -(-page_count // workers)
+        starts = range(0, page_count, step)
+        stops = [min(start + step, page_count) for start in starts]
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(_extract_page_range, repeat(pdf_path), starts, stops)
     
     def parse_resume(self, pdf_path: str) -> Dict:
-        """Parse resume and extract key information"""
-        text = self.extract_text_from_pdf(pdf_path)
+        """
+        Parse resume and extract key information
+        
+        Results are cached by absolute path, modification time and size, so
+        parsing an unchanged file again skips reading the PDF.
+        
+        Args:
+            pdf_path: Path to the resume PDF file
+            
+        Returns:
+            Dictionary with the extracted profile; callers may modify it freely
+        """
+        try:
+            stat = os.stat(pdf_path)
+        except OSError:
+            return self._parse(pdf_path)
         
-        # Extract email
-        email_matches = re.findall(self.email_pattern, text)
-        email = email_matches[0] if email_matches else None
+        fingerprint = (os.path.abspath(pdf_path), stat.st_mtime_ns, stat.st_size)
+        return copy.deepcopy(self._parse_cached(fingerprint))
+    
+    def _parse_version(self, fingerprint: tuple) -> Dict:
+        """Parse the file identified by a (path, mtime_ns, size) fingerprint"""
+        return self._parse(fingerprint[0])
+    
+    def _parse(self, pdf_path: str) -> Dict:
+        """Extract the profile fields from a resume PDF"""
+        chunks = []
+        email = phone = linkedin_url = None
         
-        # Extract phone
-        phone_matches = re.findall(self.phone_pattern, text)
-        phone = phone_matches[0] if phone_matches else None
+        # Contact details sit near the top, so each pattern only scans
+        # pages until it has found its match
+        for chunk in self._iter_text(pdf_path):
+            chunks.append(chunk)
+            
+            # Extract email
+            if email is None:
+                email_match = self.email_pattern.search(chunk)
+                email = email_match.group(0) if email_match else None
+            
+            # Extract phone
+            if phone is None:
+                phone_match = self.phone_pattern.search(chunk)
+                phone = phone_match.group(0) if phone_match else None
+            
+            # Extract LinkedIn URL
+            if linkedin_url is None:
+                linkedin_match = self.linkedin_pattern.search(chunk)
+                linkedin_url = f"https://{linkedin_match.group(0)}" if linkedin_match else None
         
-        # Extract LinkedIn URL
-        linkedin_matches = re.findall(self.linkedin_pattern, text, re.IGNORECASE)
-        linkedin_url = f"https://{linkedin_matches[0]}" if linkedin_matches else None
+        # Pages don't end in a newline; keep words on either side of a break apart
+        text = "\n".join(chunks)
         
         # Extract name (usually first line or first few words)
-        lines = text.split('\n')
-        name = None
-        for line in lines:
-            if line.strip() and len(line.strip()) > 3:
-                name = line.strip()
-                break
+        name_match = self._name_line.search(text)
+        name = name_match.group(1) if name_match else None
         
         # Extract skills (look for common skill keywords)
         skills = self._extract_skills(text)
@@ -69,43 +226,21 @@ class ResumeParser:
     
     def _extract_skills(self, text: str) -> List[str]:
         """Extract skills from resume text"""
-        common_skills = [
-            'Python', 'Java', 'JavaScript', 'React', 'Node.js', 'SQL', 'AWS',
-            'Docker', 'Kubernetes', 'Git', 'Machine Learning', 'AI', 'Django',
-            'Flask', 'Angular', 'Vue.js', 'TypeScript', 'MongoDB', 'PostgreSQL',
-            'Redis', 'Kafka', 'REST API', 'GraphQL', 'Microservices', 'Agile',
-            'TensorFlow', 'PyTorch', 'Data Analysis', 'Excel', 'Tableau',
-            'Leadership', 'Project Management', 'Communication', 'Problem Solving'
-        ]
-        
-        found_skills = []
-        text_upper = text.upper()
-        for skill in common_skills:
-            if skill.upper() in text_upper:
-                found_skills.append(skill)
-        
-        return found_skills
+        found = set()
+        for match in self._skills_pattern.finditer(text):
+            found.add(self._skills_by_group[match.lastindex - 1])
+            # Nothing left to look for
+            if len(found) == len(self.skills_list):
+                break
+        return [skill for skill in self.skills_list if skill in found]
     
     def _extract_experience(self, text: str) -> str:
         """Extract experience information from resume"""
         # Look for experience section
-        experience_keywords = ['EXPERIENCE', 'WORK HISTORY', 'EMPLOYMENT', 'PROFESSIONAL EXPERIENCE']
-        lines = text.split('\n')
-        
-        experience_section = []
-        in_experience = False
+        match = self._experience_section.search(text)
+        experience = ''
+        if match:
+            section = self._experience_keyword_line.sub('', match.group(1))
+            experience = self._line_break.sub(' ', section).strip()
         
-        for i, line in enumerate(lines):
-            line_upper = line.upper().strip()
-            if any(keyword in line_upper for keyword in experience_keywords):
-                in_experience = True
-                continue
-            
-            if in_experience:
-                # Stop at next major section
-                if any(keyword in line_upper for keyword in ['EDUCATION', 'SKILLS', 'PROJECTS', 'CERTIFICATIONS']):
-                    break
-                if line.strip():
-                    experience_section.append(line.strip())
-        
-        return ' '.join(experience_section[:500]) if experience_section else "Experience details not clearly extracted"
+        return experience[:self.MAX_EXPERIENCE_CHARS] if experience else "Experience details not clearly extracted"
@@ -2,11 +2,19 @@
 Example test file for the Startup Job Search Agent
 Note: This is a basic test structure. Expand as needed.
 """
+import asyncio
+import base64
+import email.policy
+import json
+import tempfile
+import time
 import unittest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import AsyncMock, Mock, patch, MagicMock
 import os
 import sys
 
+import httpx
+
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -14,19 +22,47 @@ from resume_parser import ResumeParser
 from linkedin_finder import LinkedInFinder
 from job_searcher import JobSearcher
 from email_drafter import EmailDrafter
+from gmail_integration import GmailIntegration
+
+
+def _write_text_pdf(path, pages):
+    """Write a minimal PDF with one line of Helvetica text per entry in pages"""
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages))), len(pages)),
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    ]
+    for i, text in enumerate(pages):
+        content = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>")
+        objects.append(f"<< /Length {len(content)} >>\nstream\n{content}\nendstream")
+    
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += f"{number} 0 obj\n{obj}\nendobj\n".encode()
+    xref = len(data)
+    data += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    data += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    data += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, 'wb') as f:
+        f.write(data)
 
 
 class TestResumeParser(unittest.TestCase):
     """Test cases for ResumeParser"""
     
-    def setUp(self):
-        self.parser = ResumeParser()
+    @classmethod
+    def setUpClass(cls):
+        cls.parser = ResumeParser()
     
     def test_email_pattern(self):
         """Test email extraction pattern"""
-        import re
         text = "Contact me at john.doe@example.com or jane@test.org"
-        matches = re.findall(self.parser.email_pattern, text)
+        matches = self.parser.email_pattern.findall(text)
         self.assertIn('john.doe@example.com', matches)
         self.assertIn('jane@test.org', matches)
     
@@ -39,6 +75,67 @@ class TestResumeParser(unittest.TestCase):
         self.assertIn('React', skills)
         self.assertIn('AWS', skills)
 
+    def test_extract_skills_matches_whole_words(self):
+        """Test that skills are not matched inside longer words"""
+        text = "Maintained JavaScript services and led agile ceremonies"
+        skills = self.parser._extract_skills(text)
+        self.assertEqual(skills, ['JavaScript', 'Agile'])
+
+    def test_extract_skills_with_dotted_capital_i(self):
+        """Test that case-insensitive matches with non-ASCII casing map back to the skill"""
+        skills = self.parser._extract_skills("Kubernetes (K8s), JAVASCRİPT, Tools: GİT, Skills: Aı")
+        self.assertEqual(skills, ['JavaScript', 'Kubernetes', 'Git', 'AI'])
+
+    def test_extract_experience(self):
+        """Test that the experience section stops at the next heading"""
+        text = "Jane Doe\nWork Experience\nEngineer at Acme\n\n  Built APIs\nEducation\nBS CS"
+        experience = self.parser._extract_experience(text)
+        self.assertEqual(experience, "Engineer at Acme Built APIs")
+
+    def test_extract_experience_skips_later_keyword_lines(self):
+        """Test lines mentioning experience keywords are dropped, not treated as section ends"""
+        text = ("Experience\nEngineer at Acme\nEmployment: full-time\n"
+                "Volunteer Experience\nMentor at Code Club\nSkills & Experience\nLed team\nEducation\nBS")
+        experience = self.parser._extract_experience(text)
+        self.assertEqual(experience, "Engineer at Acme Mentor at Code Club Led team")
+
+    def test_parse_extracts_contact_details(self):
+        """Test that contact details are taken whole from the first match"""
+        pages = ["Jane Doe\njane@example.com | +1 (555) 123-4567", "linkedin.com/in/janedoe"]
+        with patch.object(self.parser, '_iter_text', return_value=iter(pages)):
+            profile = self.parser._parse('resume.pdf')
+
+        self.assertEqual(profile['name'], 'Jane Doe')
+        self.assertEqual(profile['email'], 'jane@example.com')
+        self.assertEqual(profile['phone'], '+1 (555) 123-4567')
+        self.assertEqual(profile['linkedin_url'], 'https://linkedin.com/in/janedoe')
+
+    def test_parse_resume_caches_unchanged_file(self):
+        """Test that an unchanged resume is only parsed once"""
+        with tempfile.NamedTemporaryFile(suffix='.pdf') as resume:
+            with patch.object(self.parser, '_parse', return_value={'skills': ['Python']}) as parse:
+                first = self.parser.parse_resume(resume.name)
+                first['skills'].append('Java')
+                second = self.parser.parse_resume(resume.name)
+
+        parse.assert_called_once()
+        self.assertEqual(second['skills'], ['Python'])
+    
+    def test_parallel_extraction_matches_sequential(self):
+        """Test page ranges read by worker processes join up to the sequential text"""
+        pages = [f"Page {i} Python Docker" for i in range(7)]
+        with tempfile.TemporaryDirectory() as tmp:
+            pdf_path = os.path.join(tmp, 'resume.pdf')
+            _write_text_pdf(pdf_path, pages)
+            
+            sequential = self.parser.extract_text_from_pdf(pdf_path)
+            chunks = list(self.parser._iter_pages_in_parallel(pdf_path, len(pages), 3))
+        
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual("\n".join(chunks), sequential)
+        for text in pages:
+            self.assertIn(text, sequential)
+
 
 class TestJobSearcher(unittest.TestCase):
     """Test cases for JobSearcher"""
@@ -65,6 +162,53 @@ class TestJobSearcher(unittest.TestCase):
         # Python job should score higher
         self.assertGreater(scored_jobs[0]['match_score'], scored_jobs[1]['match_score'])
         self.assertEqual(scored_jobs[0]['title'], 'Python Developer')
+    
+    def test_score_jobs_matches_whole_skills(self):
+        """Test skills are not matched inside longer words"""
+        jobs = [
+            {
+                'title': 'Frontend Engineer',
+                'description': 'JavaScript, Node.js and REST API experience.'
+            },
+            {
+                'title': 'Backend Engineer',
+                'description': 'Own our metadata analysis pipeline.'
+            }
+        ]
+        
+        scored_jobs = self.searcher._score_jobs(jobs, ['Java', 'Node.js', 'REST API', 'Data Analysis'])
+        
+        self.assertEqual(scored_jobs[0]['match_score'], 2)
+        self.assertEqual(scored_jobs[1]['match_score'], 0)
+    
+    def test_deduplicate_jobs(self):
+        """Test cross-posted jobs are only kept once"""
+        jobs = [
+            {'title': 'Senior Python Developer', 'company': 'TechStartup Co.', 'source': 'LinkedIn'},
+            {'title': 'Senior Python-Developer', 'company': ' techstartup co. ', 'source': 'Indeed'},
+            {'title': 'Python Engineer', 'company': 'TechStartup Co.', 'source': 'Indeed'}
+        ]
+        
+        deduped = self.searcher._deduplicate_jobs(jobs)
+        
+        self.assertEqual(len(deduped), 2)
+        self.assertEqual(deduped[0]['source'], 'LinkedIn')
+    
+    def test_slow_source_is_skipped(self):
+        """Test a source that misses SOURCE_TIMEOUT doesn't hold up the others"""
+        async def slow_search(session, skills, location, limit=10):
+            await asyncio.sleep(5)
+            return [{'title': 'Late Job', 'company': 'Slow Co', 'description': '', 'source': 'Y Combinator'}]
+        
+        self.searcher.SOURCE_TIMEOUT = 0.05
+        with patch.object(self.searcher, 'search_ycombinator_jobs', side_effect=slow_search):
+            started = time.monotonic()
+            jobs = self.searcher.find_matching_jobs({'skills': ['Python']}, 'Remote')
+            elapsed = time.monotonic() - started
+        
+        sources = {job['source'] for job in jobs}
+        self.assertEqual(sources, {'AngelList', 'LinkedIn', 'Indeed'})
+        self.assertLess(elapsed, 1)
 
 
 class TestEmailDrafter(unittest.TestCase):
@@ -93,19 +237,282 @@ class TestEmailDrafter(unittest.TestCase):
         self.assertIn('Full Stack Engineer', email)
         self.assertIn('TestStartup Inc.', email)
         self.assertIn('Python', email)
+    
+    def test_draft_batch_with_ai(self):
+        """Test batched drafts are mapped back to their jobs by index"""
+        response = Mock()
+        response.choices = [Mock()]
+        response.choices[0].message.content = json.dumps({
+            'emails': [{'idx': 1, 'subject': 'Hello', 'body': 'Email for job B'}]
+        })
+        self.drafter.client = Mock()
+        self.drafter.client.chat.completions.create.return_value = response
+        
+        jobs = [
+            {'title': 'Engineer A', 'company': 'Startup A'},
+            {'title': 'Engineer B', 'company': 'Startup B'}
+        ]
+        drafts = self.drafter._draft_batch_with_ai(
+            self.drafter._candidate_prefix({'name': 'John Doe', 'skills': ['Python']}), jobs
+        )
+        
+        # Jobs missing from the response are left for the per-job fallback
+        self.assertIsNone(drafts[0])
+        self.assertEqual(drafts[1], {'subject': 'Hello', 'email': 'Email for job B'})
+
+    def test_draft_batch_with_malformed_reply(self):
+        """Test batched replies of the wrong shape fall back instead of raising"""
+        jobs = [
+            {'title': 'Engineer A', 'company': 'Startup A'},
+            {'title': 'Engineer B', 'company': 'Startup B'},
+            {'title': 'Engineer C', 'company': 'Startup C'}
+        ]
+        replies = [
+            {'emails': 5},
+            {'emails': [
+                {'idx': 0, 'body': ['p1', 'p2']},
+                {'idx': 1, 'subject': ['x'], 'body': 'Email for job B'},
+                {'idx': 2, 'body': 'Email for job C'}
+            ]}
+        ]
+        self.drafter.client = Mock()
+        
+        results = []
+        for reply in replies:
+            response = Mock()
+            response.choices = [Mock()]
+            response.choices[0].message.content = json.dumps(reply)
+            self.drafter.client.chat.completions.create.return_value = response
+            results.append(self.drafter._draft_batch_with_ai(self.drafter._candidate_prefix({'name': 'John Doe'}), jobs))
+        
+        self.assertEqual(results[0], [None, None, None])
+        self.assertIsNone(results[1][0])
+        self.assertIsNone(results[1][1])
+        self.assertEqual(results[1][2]['email'], 'Email for job C')
+        self.assertEqual(results[1][2]['subject'], self.drafter._default_subject(jobs[2]))
+
+    def test_draft_cache(self):
+        """Test cached AI drafts are reused until the prompt inputs change"""
+        self.drafter.api_key = 'test-key'
+        self.drafter.client = Mock()
+        self.drafter._cache = {}
+        user_profile = {'name': 'John Doe', 'skills': ['Python'], 'experience': 'Engineer at Acme'}
+        job = {'title': 'Engineer', 'company': 'Startup A', 'description': 'Build APIs'}
+        
+        prefix = self.drafter._candidate_prefix(user_profile)
+        
+        self.assertIsNone(self.drafter._get_cached_draft(prefix, job, 'professional'))
+        self.drafter._store_cached_draft(prefix, job, 'professional',
+                                         {'subject': 'Hi', 'email': 'Cached email'})
+        
+        self.assertEqual(self.drafter.draft_cold_email(user_profile, job), 'Cached email')
+        self.drafter.client.chat.completions.create.assert_not_called()
+        
+        # Editing the experience section changes the prompt, so the draft is stale
+        edited_prefix = self.drafter._candidate_prefix(dict(user_profile, experience='Staff engineer at Acme'))
+        self.assertIsNone(self.drafter._get_cached_draft(edited_prefix, job, 'professional'))
+        self.assertIsNone(self.drafter._get_cached_draft(prefix, job, 'casual'))
+
+    def test_draft_multiple_emails_with_ai(self):
+        """Test batched drafts, per-job fallback for missed jobs, and cache reuse"""
+        self.drafter.api_key = 'test-key'
+        self.drafter._cache = {}
+        user_profile = {'name': 'John Doe', 'skills': ['Python']}
+        jobs = [
+            {'title': 'Engineer A', 'company': 'Startup A'},
+            {'title': 'Engineer B', 'company': 'Startup B'},
+            {'title': 'Engineer C', 'company': 'Startup C'}
+        ]
+
+        # The batched reply skips job B, so it is drafted with the async client
+        batch_response = Mock()
+        batch_response.choices = [Mock()]
+        batch_response.choices[0].message.content = json.dumps({'emails': [
+            {'idx': 2, 'subject': 'Subject C', 'body': 'Email for job C'},
+            {'idx': 0, 'subject': 'Subject A', 'body': 'Email for job A'}
+        ]})
+        self.drafter.client = Mock()
+        self.drafter.client.chat.completions.create.return_value = batch_response
+
+        async_response = Mock()
+        async_response.choices = [Mock()]
+        async_response.choices[0].message.content = 'Email for job B\n'
+        aclient = MagicMock()
+        aclient.__aenter__.return_value = aclient
+        aclient.chat.completions.create = AsyncMock(return_value=async_response)
+
+        with patch('openai.AsyncOpenAI', return_value=aclient):
+            first = self.drafter.draft_multiple_emails(user_profile, jobs)
+            second = self.drafter.draft_multiple_emails(user_profile, jobs)
+
+        self.assertEqual([d['job'] for d in first], jobs)
+        self.assertEqual([d['email'] for d in first], ['Email for job A', 'Email for job B', 'Email for job C'])
+        self.assertEqual([d['subject'] for d in first],
+                         ['Subject A', self.drafter._default_subject(jobs[1]), 'Subject C'])
+        self.assertEqual(second, first)
+        self.assertEqual(self.drafter.client.chat.completions.create.call_count, 1)
+        self.assertEqual(aclient.chat.completions.create.await_count, 1)
 
 
 class TestLinkedInFinder(unittest.TestCase):
     """Test cases for LinkedInFinder"""
     
-    def setUp(self):
-        self.finder = LinkedInFinder()
+    @classmethod
+    def setUpClass(cls):
+        cls.finder = LinkedInFinder()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.finder.close()
     
     def test_initialization(self):
         """Test LinkedInFinder initialization"""
         self.assertIsNotNone(self.finder.headers)
         self.assertIn('User-Agent', self.finder.headers)
 
+    def test_search_cache(self):
+        """Test only found profiles are cached, and only until CACHE_TTL"""
+        disk_cache = {}
+        profile_url = 'https://www.linkedin.com/in/jane-doe'
+        with patch.object(self.finder, '_search_cache', {}), \
+                patch.object(self.finder, '_open_cache', return_value=disk_cache), \
+                patch.object(self.finder, '_search_google', side_effect=[None, profile_url, profile_url]) as search:
+            # A miss is retried on the next call
+            self.assertIsNone(self.finder.search_profile('Jane Doe'))
+            self.assertEqual(self.finder.search_profile('Jane Doe'), profile_url)
+            self.assertEqual(self.finder.search_profile('Jane Doe'), profile_url)
+            self.assertEqual(search.call_count, 2)
+            
+            # An expired entry from an earlier run is searched again
+            self.finder._search_cache.clear()
+            for entry in disk_cache.values():
+                entry['cached_at'] -= self.finder.CACHE_TTL + 1
+            self.assertEqual(self.finder.search_profile('Jane Doe'), profile_url)
+            self.assertEqual(search.call_count, 3)
+
+    def test_enrich_profiles(self):
+        """Test batched LinkedIn and online presence lookups"""
+        def respond(request):
+            if request.url.host == 'www.google.com':
+                return httpx.Response(200, content=b'<a href="/url?q=https://www.linkedin.com/in/jane-doe&sa=U">Jane</a>')
+            if str(request.url) == 'https://github.com/jane-doe':
+                return httpx.Response(200)
+            return httpx.Response(404)
+
+        candidates = [
+            {'name': 'Jane Doe', 'email': 'jdoe@example.com'},
+            {'name': 'John Roe', 'linkedin_url': 'https://www.linkedin.com/in/john-roe'},
+        ]
+        def make_client():
+            return httpx.AsyncClient(transport=httpx.MockTransport(respond))
+
+        with patch.object(self.finder, '_async_client', side_effect=make_client), \
+                patch.object(self.finder, 'client', httpx.Client(transport=httpx.MockTransport(respond))), \
+                patch.object(self.finder, '_open_cache', return_value=None):
+            jane, john = self.finder.enrich_profiles(candidates)
+
+        self.assertEqual(jane['linkedin_url'], 'https://www.linkedin.com/in/jane-doe')
+        self.assertEqual(jane['online_presence']['github'], 'https://github.com/jane-doe')
+        self.assertIsNone(jane['online_presence']['twitter'])
+        self.assertIsNone(john['linkedin_url'])
+        self.assertIsNone(john['online_presence'])
+
+
+class TestGmailIntegration(unittest.TestCase):
+    """Test cases for GmailIntegration"""
+    
+    def setUp(self):
+        with patch.object(GmailIntegration, 'authenticate'):
+            self.gmail = GmailIntegration()
+    
+    def test_build_draft_body(self):
+        """Test the raw draft message parses back to the original email"""
+        draft = self.gmail._build_draft_body(
+            'hiring@example.com',
+            'Application for Développeur at Café Inc.',
+            'Bonjour,\nJe suis très intéressé.'
+        )
+        
+        raw = base64.urlsafe_b64decode(draft['message']['raw'])
+        message = email.message_from_bytes(raw, policy=email.policy.default)
+        
+        self.assertEqual(message['to'], 'hiring@example.com')
+        self.assertEqual(message['subject'], 'Application for Développeur at Café Inc.')
+        self.assertEqual(message.get_content().splitlines(), ['Bonjour,', 'Je suis très intéressé.'])
+
+    def test_build_draft_body_keeps_non_newline_separators(self):
+        """Test only CR/LF line breaks are treated as new lines"""
+        draft = self.gmail._build_draft_body('hiring@example.com', 'Hello\nthere', 'Hi\x0cthere\u2028you\r\nBye')
+        
+        raw = base64.urlsafe_b64decode(draft['message']['raw'])
+        headers, _, content = raw.partition(b'\r\n\r\n')
+        
+        self.assertIn(b'Subject: Hello there\r\n', headers)
+        self.assertEqual(content.decode('utf-8').split('\r\n'), ['Hi\x0cthere\u2028you', 'Bye'])
+
+    def test_build_draft_body_with_long_line(self):
+        """Test a body line over the RFC 5322 limit is base64-encoded"""
+        body = 'Déjà vu. ' * 200 + '\nThanks'
+        draft = self.gmail._build_draft_body('hiring@example.com', 'Hello', body)
+        
+        raw = base64.urlsafe_b64decode(draft['message']['raw'])
+        message = email.message_from_bytes(raw, policy=email.policy.default)
+        
+        self.assertEqual(message['content-transfer-encoding'], 'base64')
+        self.assertTrue(all(len(line) <= 998 for line in raw.split(b'\r\n')))
+        self.assertEqual(message.get_content().splitlines(), body.splitlines())
+
+    def test_create_multiple_drafts_in_batches(self):
+        """Test batched draft results keep input order and record per-item errors"""
+        class FakeBatch:
+            """Stands in for BatchHttpRequest, answering callbacks in reverse order"""
+            def __init__(self, callback, fail_ids=(), raise_error=None):
+                self.callback = callback
+                self.fail_ids = fail_ids
+                self.raise_error = raise_error
+                self.request_ids = []
+
+            def add(self, request, request_id):
+                self.request_ids.append(request_id)
+
+            def execute(self):
+                if self.raise_error:
+                    raise self.raise_error
+                for request_id in reversed(self.request_ids):
+                    if request_id in self.fail_ids:
+                        self.callback(request_id, None, Exception('quota exceeded'))
+                    else:
+                        self.callback(request_id, {'id': f'draft-{request_id}'}, None)
+
+        batches = iter([
+            {},
+            {'fail_ids': ('3',)},
+            {'raise_error': Exception('connection reset')},
+        ])
+        self.gmail.service = Mock()
+        self.gmail.service.new_batch_http_request.side_effect = (
+            lambda callback: FakeBatch(callback, **next(batches))
+        )
+        drafted_emails = [
+            {'subject': f'Subject {i}', 'email': 'Hello', 'job': {'title': f'Job {i}', 'company': 'Startup'}}
+            for i in range(5)
+        ]
+        # A draft whose body can't be built fails on its own
+        drafted_emails[1]['email'] = None
+
+        with patch.object(self.gmail, 'MAX_BATCH_SIZE', 2):
+            results = self.gmail.create_multiple_drafts(drafted_emails)
+
+        self.assertEqual(self.gmail.service.new_batch_http_request.call_count, 3)
+        self.assertEqual([result.get('id') for result in results],
+                         ['draft-0', None, 'draft-2', None, None])
+        self.assertEqual(results[0]['subject'], 'Subject 0')
+        self.assertIn('error', results[1])
+        self.assertEqual(results[3]['error'], 'quota exceeded')
+        self.assertEqual(results[4]['error'], 'connection reset')
+        self.assertEqual([result['job_title'] for result in results],
+                         [f'Job {i}' for i in range(5)])
+
 
 if __name__ == '__main__':
     unittest.main()